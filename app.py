@@ -4,25 +4,37 @@
 from __future__ import annotations
 
 import base64
+import hashlib
+import hmac
 import json
 import os
+import secrets
+import shutil
 import sqlite3
-from datetime import datetime, timezone
+import threading
+import time
+import zipfile
+from datetime import datetime, timedelta, timezone
 from functools import wraps
+from typing import Callable
 from pathlib import Path
 
+import click
 from flask import (
     Flask,
     Response,
+    jsonify,
     redirect,
     render_template,
     request,
     send_from_directory,
+    stream_with_context,
     url_for,
 )
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 
-from questions import FORM_SECTIONS, flatten_questions
+from questions import FORM_SECTIONS, build_dependency_map, flatten_questions
 
 # ------------------------------------------------------------
 # Paths / storage
@@ -43,18 +55,113 @@ app = Flask(__name__)
 # ---------------- Upload config ----------------
 
 ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "pdf"}
-MAX_FILE_SIZE_MB = 10  # currently informational (you can enforce if you want)
+MAX_FILE_SIZE_MB = 10  # enforced for draft (chunked) uploads; plain form POSTs are not capped
+
+# file input name -> (stored filename prefix, payload key)
+UPLOAD_FIELDS = {
+    "food_diary_upload": ("food", "food_uploads"),
+    "supplement_labels_upload": ("supp", "supp_uploads"),
+    "weighin_sheet_upload": ("weigh", "weigh_uploads"),
+}
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 
+# ---------------- Form branching ----------------
+
+# Built once: show_if never changes at runtime
+SHOW_IF_DEPENDENTS = build_dependency_map(FORM_SECTIONS)
+
+# ---------------- Draft config ----------------
+
+DRAFT_TTL_HOURS = int(os.environ.get("DRAFT_TTL_HOURS", "72"))
+DRAFT_MAX_PATCH_BYTES = 64 * 1024
+DRAFT_MAX_CHUNK_BYTES = 1024 * 1024
+# Drafts need no login, so cap what one token can park on disk until it expires
+DRAFT_MAX_DATA_BYTES = 256 * 1024
+DRAFT_MAX_UPLOADS_PER_FIELD = 5  # form says 1–5 files per field
+
+# In-progress chunked uploads: uploads/drafts/<token>/<upload_id>
+DRAFT_UPLOAD_FOLDER = os.path.join(UPLOAD_FOLDER, "drafts")
+os.makedirs(DRAFT_UPLOAD_FOLDER, exist_ok=True)
+
 # ------------------------------------------------------------
 # Coach Basic Auth (protect summary/export/uploads)
 # ------------------------------------------------------------
 
+# Coaches live in the `coaches` table (add with: flask --app app add-coach <name>).
+# COACH_USER / COACH_PASS only seed the first account when the table is empty.
 COACH_USER = os.environ.get("COACH_USER", "coach")
 COACH_PASS = os.environ.get("COACH_PASS", "change-me")
 
+# scrypt cost: ~50ms per check, so it's paid once per cache window, not per thumbnail
+SCRYPT_N = 2**14
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+# Verified Authorization headers are remembered (as SHA-256 digests) for this long.
+# The digest also covers the coach's stored hash, which is re-read from SQLite on
+# every request, so a CLI password reset or remove-coach takes effect immediately.
+AUTH_CACHE_SECONDS = int(os.environ.get("AUTH_CACHE_SECONDS", "300"))
+AUTH_CACHE_MAX_ENTRIES = 1024
+
+_auth_cache: dict[str, float] = {}
+_auth_cache_lock = threading.Lock()
+
+
+def hash_password(password: str) -> str:
+    salt = secrets.token_bytes(16)
+    digest = hashlib.scrypt(
+        password.encode("utf-8"), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, dklen=32
+    )
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(password: str, stored: str) -> bool:
+    try:
+        algorithm, n, r, p, salt_hex, digest_hex = stored.split("$")
+        if algorithm != "scrypt":
+            return False
+        digest = hashlib.scrypt(
+            password.encode("utf-8"),
+            salt=bytes.fromhex(salt_hex),
+            n=int(n),
+            r=int(r),
+            p=int(p),
+            dklen=len(digest_hex) // 2,
+        )
+    except (ValueError, TypeError):
+        return False
+
+    return hmac.compare_digest(digest.hex(), digest_hex)
+
+
+# Compared against for unknown usernames so they cost the same as a wrong password
+_DUMMY_PASSWORD_HASH = hash_password(secrets.token_hex(16))
+
+
+def _auth_cache_hit(header_digest: str) -> bool:
+    now = time.monotonic()
+    with _auth_cache_lock:
+        expires_at = _auth_cache.get(header_digest)
+        if expires_at is None:
+            return False
+        if expires_at <= now:
+            del _auth_cache[header_digest]
+            return False
+        return True
+
+
+def _auth_cache_store(header_digest: str) -> None:
+    now = time.monotonic()
+    with _auth_cache_lock:
+        if len(_auth_cache) >= AUTH_CACHE_MAX_ENTRIES:
+            for key in [k for k, exp in _auth_cache.items() if exp <= now]:
+                del _auth_cache[key]
+            if len(_auth_cache) >= AUTH_CACHE_MAX_ENTRIES:
+                _auth_cache.clear()
+        _auth_cache[header_digest] = now + AUTH_CACHE_SECONDS
+
 
 def check_basic_auth(auth_header: str | None) -> bool:
     if not auth_header or not auth_header.startswith("Basic "):
@@ -67,7 +174,19 @@ def check_basic_auth(auth_header: str | None) -> bool:
     except Exception:
         return False
 
-    return username == COACH_USER and password == COACH_PASS
+    coach = fetch_coach(username)
+    stored = coach["password_hash"] if coach is not None else _DUMMY_PASSWORD_HASH
+
+    # Only a digest is kept in memory, never the password itself
+    header_digest = hashlib.sha256(f"{auth_header}\0{stored}".encode("utf-8")).hexdigest()
+    if coach is not None and _auth_cache_hit(header_digest):
+        return True
+
+    if not verify_password(password, stored) or coach is None:
+        return False
+
+    _auth_cache_store(header_digest)
+    return True
 
 
 def require_basic_auth(view_func):
@@ -121,14 +240,27 @@ def save_uploaded_files(files, prefix: str, intake_id: int) -> list[str]:
 # Database helpers
 # ------------------------------------------------------------
 
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
 def get_connection() -> sqlite3.Connection:
-    connection = sqlite3.connect(DB_PATH)
+    # timeout: web + worker processes share the file, so wait on locks instead of failing
+    connection = sqlite3.connect(DB_PATH, timeout=10)
     connection.row_factory = sqlite3.Row
     return connection
 
 
 def init_db() -> None:
+    seed_hash = hash_password(COACH_PASS)
+
     with get_connection() as connection:
+        # WAL lets the worker write job state without blocking form submits
+        connection.execute("PRAGMA journal_mode=WAL;")
+
+        # Gunicorn workers + worker.py all run this at startup: one write
+        # transaction for schema + seed makes them take turns
+        connection.execute("BEGIN IMMEDIATE;")
         connection.execute(
             """
             CREATE TABLE IF NOT EXISTS intakes (
@@ -140,6 +272,85 @@ def init_db() -> None:
             );
             """
         )
+
+        # Draft token / client submission id the intake came from: a retried or
+        # replayed submit finds it here instead of inserting a second intake
+        # (added after launch, so migrate)
+        intake_columns = {r["name"] for r in connection.execute("PRAGMA table_info(intakes)")}
+        for column in ("draft_token", "submission_id"):
+            if column not in intake_columns:
+                connection.execute(f"ALTER TABLE intakes ADD COLUMN {column} TEXT;")
+            connection.execute(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS idx_intakes_{column} ON intakes ({column});"
+            )
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload_json TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 5,
+                run_after_utc TEXT NOT NULL,
+                leased_by TEXT,
+                leased_until_utc TEXT,
+                last_error TEXT,
+                created_at_utc TEXT NOT NULL,
+                finished_at_utc TEXT
+            );
+            """
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, run_after_utc);"
+        )
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS drafts (
+                token TEXT PRIMARY KEY,
+                created_at_utc TEXT NOT NULL,
+                updated_at_utc TEXT NOT NULL,
+                expires_at_utc TEXT NOT NULL,
+                data_json TEXT NOT NULL DEFAULT '{}'
+            );
+            """
+        )
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS draft_uploads (
+                id TEXT PRIMARY KEY,
+                draft_token TEXT NOT NULL,
+                field TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                received INTEGER NOT NULL DEFAULT 0,
+                created_at_utc TEXT NOT NULL
+            );
+            """
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_draft_uploads_token ON draft_uploads (draft_token);"
+        )
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS coaches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL UNIQUE,
+                password_hash TEXT NOT NULL,
+                created_at_utc TEXT NOT NULL
+            );
+            """
+        )
+
+        # Seed the first coach from the environment so existing deploys keep working
+        connection.execute(
+            """
+            INSERT OR IGNORE INTO coaches (username, password_hash, created_at_utc)
+            SELECT ?, ?, ?
+            WHERE NOT EXISTS (SELECT 1 FROM coaches)
+            """,
+            (COACH_USER, seed_hash, utc_now()),
+        )
         connection.commit()
 
 
@@ -148,16 +359,32 @@ init_db()
 print("DB_PATH:", DB_PATH)
 
 
-def insert_intake(athlete_name: str | None, email: str | None, data: dict) -> int:
-    created_at_utc = datetime.now(timezone.utc).isoformat()
+def insert_intake(
+    athlete_name: str | None,
+    email: str | None,
+    data: dict,
+    draft_token: str | None = None,
+    submission_id: str | None = None,
+) -> int:
+    """Insert an intake. Raises sqlite3.IntegrityError if either key was already used."""
+    created_at_utc = utc_now()
 
     with get_connection() as connection:
         cursor = connection.execute(
             """
-            INSERT INTO intakes (created_at_utc, athlete_name, email, data_json)
-            VALUES (?, ?, ?, ?)
+            INSERT INTO intakes (
+                created_at_utc, athlete_name, email, data_json, draft_token, submission_id
+            )
+            VALUES (?, ?, ?, ?, ?, ?)
             """,
-            (created_at_utc, athlete_name, email, json.dumps(data, ensure_ascii=False)),
+            (
+                created_at_utc,
+                athlete_name,
+                email,
+                json.dumps(data, ensure_ascii=False),
+                draft_token,
+                submission_id,
+            ),
         )
         connection.commit()
         return int(cursor.lastrowid)
@@ -172,12 +399,51 @@ def fetch_intake(intake_id: int) -> sqlite3.Row | None:
         return row
 
 
+def fetch_submitted_intake(draft_token: str | None, submission_id: str | None) -> sqlite3.Row | None:
+    # NULL never compares equal, so a missing key simply doesn't match
+    with get_connection() as connection:
+        row = connection.execute(
+            "SELECT * FROM intakes WHERE draft_token = ? OR submission_id = ?",
+            (draft_token, submission_id),
+        ).fetchone()
+        return row
+
+
 def fetch_all_intakes() -> list[sqlite3.Row]:
     with get_connection() as connection:
         rows = connection.execute("SELECT * FROM intakes ORDER BY id DESC").fetchall()
         return list(rows)
 
 
+def fetch_coach(username: str) -> sqlite3.Row | None:
+    with get_connection() as connection:
+        row = connection.execute(
+            "SELECT * FROM coaches WHERE username = ?",
+            (username,),
+        ).fetchone()
+        return row
+
+
+def upsert_coach(username: str, password: str) -> None:
+    with get_connection() as connection:
+        connection.execute(
+            """
+            INSERT INTO coaches (username, password_hash, created_at_utc)
+            VALUES (?, ?, ?)
+            ON CONFLICT (username) DO UPDATE SET password_hash = excluded.password_hash
+            """,
+            (username, hash_password(password), utc_now()),
+        )
+        connection.commit()
+
+
+def delete_coach(username: str) -> bool:
+    with get_connection() as connection:
+        cursor = connection.execute("DELETE FROM coaches WHERE username = ?", (username,))
+        connection.commit()
+        return cursor.rowcount > 0
+
+
 def update_payload(intake_id: int, payload: dict) -> None:
     with get_connection() as connection:
         connection.execute(
@@ -192,99 +458,162 @@ def update_payload(intake_id: int, payload: dict) -> None:
 
 
 # ------------------------------------------------------------
-# Routes
+# Background jobs (SQLite-backed queue, drained by worker.py)
 # ------------------------------------------------------------
 
-@app.route("/uploads/<filename>")
-@require_basic_auth
-def uploaded_file(filename: str):
-    # Serve from the configured upload folder (stable on Render)
-    return send_from_directory(app.config["UPLOAD_FOLDER"], filename)
+JOB_LEASE_SECONDS = 60
+JOB_RETRY_BASE_SECONDS = 10
+JOB_DONE_RETENTION_DAYS = 7
 
+# kind -> callable(payload: dict). Register with @job_handler("kind").
+JOB_HANDLERS: dict[str, Callable[[dict], None]] = {}
 
-@app.route("/", methods=["GET"])
-def form():
-    flat_questions = flatten_questions(FORM_SECTIONS)
 
-    return render_template(
-        "form.html",
-        sections=FORM_SECTIONS,
-        flat_questions=flat_questions,
-    )
+def job_handler(kind: str):
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
 
+    return decorator
 
-@app.route("/submit", methods=["POST"])
-def submit():
-    payload: dict[str, object] = {}
 
-    athlete_name = (request.form.get("athlete_name") or "").strip() or None
-    email = (request.form.get("email") or "").strip() or None
+def enqueue_job(kind: str, payload: dict, max_attempts: int = 5) -> int:
+    now = utc_now()
 
-    for key in request.form.keys():
-        if key in ("athlete_name", "email"):
-            continue
+    with get_connection() as connection:
+        cursor = connection.execute(
+            """
+            INSERT INTO jobs (kind, payload_json, max_attempts, run_after_utc, created_at_utc)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (kind, json.dumps(payload, ensure_ascii=False), max_attempts, now, now),
+        )
+        connection.commit()
+        return int(cursor.lastrowid)
 
-        values = request.form.getlist(key)
-        if len(values) == 1:
-            payload[key] = values[0].strip()
-        else:
-            payload[key] = [v.strip() for v in values if v.strip()]
 
-    payload["_meta"] = {
-        "submitted_at_utc": datetime.now(timezone.utc).isoformat(),
-        "user_agent": request.headers.get("User-Agent", ""),
-    }
+def claim_next_job(worker_id: str, lease_seconds: int = JOB_LEASE_SECONDS) -> sqlite3.Row | None:
+    """Lease the oldest runnable job. Expired leases (crashed worker) are picked up again."""
+    now = datetime.now(timezone.utc)
+    leased_until = (now + timedelta(seconds=lease_seconds)).isoformat()
 
-    intake_id = insert_intake(athlete_name, email, payload)
+    with get_connection() as connection:
+        # A lease that ran out on the last attempt (handler hung or killed the worker) is final
+        connection.execute(
+            """
+            UPDATE jobs
+            SET status = 'failed',
+                last_error = 'Lease expired on final attempt',
+                leased_by = NULL,
+                leased_until_utc = NULL,
+                finished_at_utc = ?
+            WHERE status = 'running' AND leased_until_utc <= ? AND attempts >= max_attempts
+            """,
+            (now.isoformat(), now.isoformat()),
+        )
+        row = connection.execute(
+            """
+            UPDATE jobs
+            SET status = 'running',
+                attempts = attempts + 1,
+                leased_by = ?,
+                leased_until_utc = ?
+            WHERE id = (
+                SELECT id FROM jobs
+                WHERE (status = 'queued' AND run_after_utc <= ?)
+                   OR (status = 'running' AND leased_until_utc <= ? AND attempts < max_attempts)
+                ORDER BY id
+                LIMIT 1
+            )
+            RETURNING *
+            """,
+            (worker_id, leased_until, now.isoformat(), now.isoformat()),
+        ).fetchone()
+        connection.commit()
+        return row
 
-    # -------- Handle uploads AFTER intake exists --------
-    food_files = request.files.getlist("food_diary_upload")
-    supp_files = request.files.getlist("supplement_labels_upload")
-    weigh_files = request.files.getlist("weighin_sheet_upload")
 
-    food_saved = save_uploaded_files(food_files, "food", intake_id)
-    supp_saved = save_uploaded_files(supp_files, "supp", intake_id)
-    weigh_saved = save_uploaded_files(weigh_files, "weigh", intake_id)
+def complete_job(job_id: int) -> None:
+    with get_connection() as connection:
+        connection.execute(
+            """
+            UPDATE jobs
+            SET status = 'done', leased_by = NULL, leased_until_utc = NULL, finished_at_utc = ?
+            WHERE id = ?
+            """,
+            (utc_now(), job_id),
+        )
+        connection.commit()
 
-    payload["food_uploads"] = food_saved
-    payload["supp_uploads"] = supp_saved
-    payload["weigh_uploads"] = weigh_saved
 
-    update_payload(intake_id, payload)
+def fail_job(job: sqlite3.Row, error: str) -> None:
+    # Exponential backoff; give up (status 'failed') once max_attempts is reached
+    if job["attempts"] >= job["max_attempts"]:
+        status, run_after, finished = "failed", job["run_after_utc"], utc_now()
+    else:
+        delay = JOB_RETRY_BASE_SECONDS * (2 ** (job["attempts"] - 1))
+        status = "queued"
+        run_after = (datetime.now(timezone.utc) + timedelta(seconds=delay)).isoformat()
+        finished = None
 
-    return redirect(url_for("thankyou", intake_id=intake_id))
+    with get_connection() as connection:
+        connection.execute(
+            """
+            UPDATE jobs
+            SET status = ?, run_after_utc = ?, last_error = ?,
+                leased_by = NULL, leased_until_utc = NULL, finished_at_utc = ?
+            WHERE id = ?
+            """,
+            (status, run_after, error, finished, job["id"]),
+        )
+        connection.commit()
 
 
-@app.route("/thankyou/<int:intake_id>", methods=["GET"])
-def thankyou(intake_id: int):
-    row = fetch_intake(intake_id)
-    if row is None:
-        return "Not found", 404
-    return render_template("thankyou.html", intake_id=intake_id)
+def prune_finished_jobs(retention_days: int = JOB_DONE_RETENTION_DAYS) -> int:
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=retention_days)).isoformat()
 
+    with get_connection() as connection:
+        cursor = connection.execute(
+            "DELETE FROM jobs WHERE status = 'done' AND finished_at_utc <= ?",
+            (cutoff,),
+        )
+        connection.commit()
+        return cursor.rowcount
 
-@app.route("/summary/<int:intake_id>", methods=["GET"])
-@require_basic_auth
-def summary(intake_id: int):
-    row = fetch_intake(intake_id)
-    if row is None:
-        return "Not found", 404
 
-    data = json.loads(row["data_json"])
+def run_job(job: sqlite3.Row) -> None:
+    handler = JOB_HANDLERS.get(job["kind"])
+    if handler is None:
+        fail_job(job, f"No handler registered for job kind {job['kind']!r}")
+        return
+
+    try:
+        handler(json.loads(job["payload_json"]))
+    except Exception as exc:
+        fail_job(job, f"{type(exc).__name__}: {exc}")
+        return
+
+    complete_job(job["id"])
+
+
+# ------------------------------------------------------------
+# Triage (runs in the worker after submit; summary falls back to inline)
+# ------------------------------------------------------------
+
+def to_float(value: str | None) -> float | None:
+    if value is None:
+        return None
+    value = str(value).strip()
+    if value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
 
-    def to_float(value: str | None) -> float | None:
-        if value is None:
-            return None
-        value = str(value).strip()
-        if value == "":
-            return None
-        try:
-            return float(value)
-        except ValueError:
-            return None
 
+def evaluate_triage(data: dict) -> dict:
     walk_around = to_float(data.get("walk_around_weight"))
-    weight_class = data.get("competition_weight_class")
     cut_amount = to_float(data.get("typical_cut_amount"))
 
     cut_percent = None
@@ -306,6 +635,253 @@ def summary(intake_id: int):
     if cut_percent is not None and cut_percent >= 5:
         red_flags.append(f"Typical cut ≥ 5% of walk-around ({cut_percent:.1f}%)")
 
+    return {"cut_percent": cut_percent, "red_flags": red_flags}
+
+
+@job_handler("triage_intake")
+def triage_intake_job(payload: dict) -> None:
+    intake_id = int(payload["intake_id"])
+    row = fetch_intake(intake_id)
+    if row is None:
+        return
+
+    data = json.loads(row["data_json"])
+    data["_triage"] = {**evaluate_triage(data), "evaluated_at_utc": utc_now()}
+    update_payload(intake_id, data)
+
+
+# ------------------------------------------------------------
+# Drafts (autosaved partial answers + resumable chunked uploads)
+# ------------------------------------------------------------
+
+def draft_expiry() -> str:
+    return (datetime.now(timezone.utc) + timedelta(hours=DRAFT_TTL_HOURS)).isoformat()
+
+
+def draft_upload_path(token: str, upload_id: str) -> str:
+    return os.path.join(DRAFT_UPLOAD_FOLDER, token, upload_id)
+
+
+def create_draft() -> sqlite3.Row:
+    token = secrets.token_urlsafe(24)
+    now = utc_now()
+
+    with get_connection() as connection:
+        row = connection.execute(
+            """
+            INSERT INTO drafts (token, created_at_utc, updated_at_utc, expires_at_utc)
+            VALUES (?, ?, ?, ?)
+            RETURNING *
+            """,
+            (token, now, now, draft_expiry()),
+        ).fetchone()
+        connection.commit()
+        return row
+
+
+def fetch_draft(token: str) -> sqlite3.Row | None:
+    with get_connection() as connection:
+        row = connection.execute(
+            "SELECT * FROM drafts WHERE token = ? AND expires_at_utc > ?",
+            (token, utc_now()),
+        ).fetchone()
+        return row
+
+
+def patch_draft(token: str, patch: dict) -> sqlite3.Row | None:
+    """Apply a merge patch. Returns None if the draft is gone or the result would
+    exceed DRAFT_MAX_DATA_BYTES (callers tell the two apart with fetch_draft)."""
+    # RFC 7396 merge patch done by SQLite: only the delta crosses the wire, null removes a key
+    patch_json = json.dumps(patch, ensure_ascii=False)
+
+    with get_connection() as connection:
+        row = connection.execute(
+            """
+            UPDATE drafts
+            SET data_json = json(json_patch(data_json, ?)),
+                updated_at_utc = ?,
+                expires_at_utc = ?
+            WHERE token = ? AND expires_at_utc > ?
+              AND length(CAST(json_patch(data_json, ?) AS BLOB)) <= ?
+            RETURNING *
+            """,
+            (
+                patch_json,
+                utc_now(),
+                draft_expiry(),
+                token,
+                utc_now(),
+                patch_json,
+                DRAFT_MAX_DATA_BYTES,
+            ),
+        ).fetchone()
+        connection.commit()
+        return row
+
+
+def create_draft_upload(token: str, field: str, filename: str, size: int) -> sqlite3.Row | None:
+    """Register a new upload. Returns None once the field holds DRAFT_MAX_UPLOADS_PER_FIELD."""
+    upload_id = secrets.token_hex(12)
+
+    with get_connection() as connection:
+        # Count + insert in one statement so parallel requests can't overshoot the cap
+        row = connection.execute(
+            """
+            INSERT INTO draft_uploads (id, draft_token, field, filename, size, created_at_utc)
+            SELECT ?, ?, ?, ?, ?, ?
+            WHERE (
+                SELECT COUNT(*) FROM draft_uploads WHERE draft_token = ? AND field = ?
+            ) < ?
+            RETURNING *
+            """,
+            (
+                upload_id,
+                token,
+                field,
+                filename,
+                size,
+                utc_now(),
+                token,
+                field,
+                DRAFT_MAX_UPLOADS_PER_FIELD,
+            ),
+        ).fetchone()
+        connection.commit()
+
+    if row is not None:
+        os.makedirs(os.path.join(DRAFT_UPLOAD_FOLDER, token), exist_ok=True)
+        open(draft_upload_path(token, upload_id), "wb").close()
+
+    return row
+
+
+def fetch_draft_upload(token: str, upload_id: str) -> sqlite3.Row | None:
+    with get_connection() as connection:
+        row = connection.execute(
+            "SELECT * FROM draft_uploads WHERE id = ? AND draft_token = ?",
+            (upload_id, token),
+        ).fetchone()
+        return row
+
+
+def fetch_draft_uploads(token: str) -> list[sqlite3.Row]:
+    with get_connection() as connection:
+        rows = connection.execute(
+            "SELECT * FROM draft_uploads WHERE draft_token = ? ORDER BY created_at_utc",
+            (token,),
+        ).fetchall()
+        return list(rows)
+
+
+def write_draft_chunk(upload: sqlite3.Row, offset: int, chunk: bytes) -> int:
+    """Write a chunk at `offset`. Re-sending a chunk after a dropped response is harmless."""
+    with open(draft_upload_path(upload["draft_token"], upload["id"]), "r+b") as f:
+        f.seek(offset)
+        f.write(chunk)
+
+    received = max(upload["received"], offset + len(chunk))
+
+    with get_connection() as connection:
+        connection.execute(
+            "UPDATE draft_uploads SET received = MAX(received, ?) WHERE id = ?",
+            (received, upload["id"]),
+        )
+        connection.commit()
+
+    return received
+
+
+def delete_draft_uploads(token: str, field: str) -> int:
+    """Drop a field's uploads, e.g. when the athlete picks a different set of files."""
+    uploads = [u for u in fetch_draft_uploads(token) if u["field"] == field]
+
+    with get_connection() as connection:
+        connection.execute(
+            "DELETE FROM draft_uploads WHERE draft_token = ? AND field = ?",
+            (token, field),
+        )
+        connection.commit()
+
+    for upload in uploads:
+        try:
+            os.remove(draft_upload_path(token, upload["id"]))
+        except FileNotFoundError:
+            pass
+
+    return len(uploads)
+
+
+def delete_draft(token: str) -> None:
+    with get_connection() as connection:
+        connection.execute("DELETE FROM draft_uploads WHERE draft_token = ?", (token,))
+        connection.execute("DELETE FROM drafts WHERE token = ?", (token,))
+        connection.commit()
+
+    shutil.rmtree(os.path.join(DRAFT_UPLOAD_FOLDER, token), ignore_errors=True)
+
+
+def purge_expired_drafts() -> int:
+    with get_connection() as connection:
+        rows = connection.execute(
+            "SELECT token FROM drafts WHERE expires_at_utc <= ?",
+            (utc_now(),),
+        ).fetchall()
+
+    for row in rows:
+        delete_draft(row["token"])
+
+    return len(rows)
+
+
+def promote_draft_uploads(token: str, intake_id: int, skip_fields: set[str]) -> dict[str, list[str]]:
+    """Move completed draft uploads into the normal uploads folder for `intake_id`."""
+    promoted: dict[str, list[str]] = {}
+
+    for upload in fetch_draft_uploads(token):
+        field = upload["field"]
+        if field in skip_fields or upload["received"] < upload["size"]:
+            continue
+
+        prefix, payload_key = UPLOAD_FIELDS[field]
+        # Upload id keeps same-named phone photos ("image.jpg") from overwriting each other
+        stored_name = f"{intake_id}_{prefix}_{upload['id']}_{secure_filename(upload['filename'])}"
+        os.replace(
+            draft_upload_path(token, upload["id"]),
+            os.path.join(app.config["UPLOAD_FOLDER"], stored_name),
+        )
+        promoted.setdefault(payload_key, []).append(stored_name)
+
+    return promoted
+
+
+# ------------------------------------------------------------
+# Summary / export helpers
+# ------------------------------------------------------------
+
+UPLOAD_LIST_KEYS = tuple(payload_key for _, payload_key in UPLOAD_FIELDS.values())
+
+# Already-compressed formats are stored as-is; deflating them only burns CPU
+ZIP_STORED_EXTENSIONS = {"jpg", "jpeg", "png", "pdf"}
+ZIP_CHUNK_SIZE = 64 * 1024
+
+
+def build_summary_data(row: sqlite3.Row) -> dict:
+    data = json.loads(row["data_json"])
+
+    weight_class = data.get("competition_weight_class")
+
+    # Prefer the worker's stored result; evaluate inline if it hasn't run yet
+    # (or if an older row holds something that isn't the worker's shape)
+    triage = data.get("_triage")
+    if not (
+        isinstance(triage, dict)
+        and isinstance(triage.get("red_flags"), list)
+        and isinstance(triage.get("cut_percent"), (int, float, type(None)))
+    ):
+        triage = evaluate_triage(data)
+    cut_percent = triage["cut_percent"]
+    red_flags = triage["red_flags"]
+
     summary_data = {
         "created_at_utc": row["created_at_utc"],
         "athlete_name": row["athlete_name"],
@@ -322,6 +898,357 @@ def summary(intake_id: int):
         "raw": data,
     }
 
+    return summary_data
+
+
+class ZipStream:
+    """Write-only, unseekable sink: zipfile writes into it, we yield what piles up."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries):
+    """Yield a ZIP archive piece by piece from (arcname, bytes | path) pairs.
+
+    Nothing is buffered beyond one file chunk, so archives of any size
+    stream with flat memory and no temporary files.
+    """
+    sink = ZipStream()
+    date_time = datetime.now(timezone.utc).timetuple()[:6]
+
+    with zipfile.ZipFile(sink, "w") as archive:
+        for arcname, source in entries:
+            ext = arcname.rsplit(".", 1)[-1].lower()
+            info = zipfile.ZipInfo(arcname, date_time=date_time)
+            info.compress_type = (
+                zipfile.ZIP_STORED if ext in ZIP_STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+            )
+
+            if isinstance(source, bytes):
+                archive.writestr(info, source)
+            else:
+                with open(source, "rb") as src, archive.open(info, "w") as dest:
+                    while chunk := src.read(ZIP_CHUNK_SIZE):
+                        dest.write(chunk)
+                        yield sink.drain()
+
+            yield sink.drain()
+
+    # Central directory is written on close
+    yield sink.drain()
+
+
+def intake_bundle_entries(row: sqlite3.Row, prefix: str = ""):
+    """Archive entries for one intake: summary page, answers JSON and uploaded files."""
+    summary_data = build_summary_data(row)
+    data = summary_data["raw"]
+
+    summary_html = render_template(
+        "summary.html",
+        intake_id=row["id"],
+        s=summary_data,
+        upload_base="uploads/",
+    )
+    yield f"{prefix}summary.html", summary_html.encode("utf-8")
+
+    answers = {
+        "id": row["id"],
+        "created_at_utc": row["created_at_utc"],
+        "athlete_name": row["athlete_name"],
+        "email": row["email"],
+        "answers": data,
+    }
+    yield f"{prefix}answers.json", json.dumps(answers, ensure_ascii=False, indent=2).encode("utf-8")
+
+    # Same-named photos (e.g. iOS "image.jpg") can map to one stored name;
+    # each archive entry must be unique, so list every file once
+    stored_names = [name for key in UPLOAD_LIST_KEYS for name in (data.get(key) or [])]
+
+    for stored_name in dict.fromkeys(stored_names):
+        path = safe_join(app.config["UPLOAD_FOLDER"], stored_name)
+        if path is None or not os.path.isfile(path):
+            continue
+        yield f"{prefix}uploads/{stored_name}", path
+
+
+def zip_response(entries, filename: str) -> Response:
+    return Response(
+        stream_with_context(stream_zip(entries)),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+# ------------------------------------------------------------
+# Routes
+# ------------------------------------------------------------
+
+@app.route("/uploads/<filename>")
+@require_basic_auth
+def uploaded_file(filename: str):
+    # Serve from the configured upload folder (stable on Render)
+    return send_from_directory(app.config["UPLOAD_FOLDER"], filename)
+
+
+@app.route("/", methods=["GET"])
+def form():
+    flat_questions = flatten_questions(FORM_SECTIONS)
+
+    return render_template(
+        "form.html",
+        sections=FORM_SECTIONS,
+        flat_questions=flat_questions,
+        show_if_dependents=SHOW_IF_DEPENDENTS,
+    )
+
+
+@app.route("/sw.js", methods=["GET"])
+def service_worker():
+    # Served from the root so its scope covers the form and /submit
+    response = send_from_directory(app.static_folder, "sw.js", mimetype="text/javascript", max_age=0)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@app.route("/submit", methods=["POST"])
+def submit():
+    payload: dict[str, object] = {}
+
+    # Autosaved draft (see /drafts). Posted fields win; the draft's answers are
+    # only used when the retry carries nothing but the token.
+    draft_token = (request.form.get("draft_token") or "").strip() or None
+    # Generated by the page; the service worker replays it unchanged when offline
+    submission_id = (request.form.get("submission_id") or "").strip() or None
+
+    # Retry after a lost response / offline replay: already stored
+    if draft_token or submission_id:
+        existing = fetch_submitted_intake(draft_token, submission_id)
+        if existing is not None:
+            return redirect(url_for("thankyou", intake_id=existing["id"]))
+
+    draft = fetch_draft(draft_token) if draft_token else None
+
+    # "_"-prefixed keys (_meta, _triage, ...) are written by the server only
+    form_keys = [
+        k for k in request.form.keys()
+        if k not in ("draft_token", "submission_id") and not k.startswith("_")
+    ]
+
+    if draft_token and draft is None and not form_keys:
+        return "Draft expired, please fill in the form again", 410
+
+    if draft is not None and not form_keys:
+        answers = json.loads(draft["data_json"])
+        athlete_name = (str(answers.pop("athlete_name", "") or "")).strip() or None
+        email = (str(answers.pop("email", "") or "")).strip() or None
+        payload.update({k: v for k, v in answers.items() if not k.startswith("_")})
+    else:
+        athlete_name = (request.form.get("athlete_name") or "").strip() or None
+        email = (request.form.get("email") or "").strip() or None
+
+        for key in form_keys:
+            if key in ("athlete_name", "email"):
+                continue
+
+            values = request.form.getlist(key)
+            if len(values) == 1:
+                payload[key] = values[0].strip()
+            else:
+                payload[key] = [v.strip() for v in values if v.strip()]
+
+    payload["_meta"] = {
+        "submitted_at_utc": datetime.now(timezone.utc).isoformat(),
+        "user_agent": request.headers.get("User-Agent", ""),
+    }
+
+    # The insert claims the keys (UNIQUE): only one of several concurrent
+    # retries gets past here and promotes/deletes the draft
+    try:
+        intake_id = insert_intake(
+            athlete_name, email, payload, draft_token=draft_token, submission_id=submission_id
+        )
+    except sqlite3.IntegrityError:
+        existing = fetch_submitted_intake(draft_token, submission_id)
+        return redirect(url_for("thankyou", intake_id=existing["id"]))
+
+    # -------- Handle uploads AFTER intake exists --------
+    posted_fields: set[str] = set()
+
+    for field, (prefix, payload_key) in UPLOAD_FIELDS.items():
+        saved = save_uploaded_files(request.files.getlist(field), prefix, intake_id)
+        if saved:
+            posted_fields.add(field)
+        payload[payload_key] = saved
+
+    # Files already sent in chunks are moved over, unless the form re-sent that field
+    if draft is not None:
+        promoted = promote_draft_uploads(draft["token"], intake_id, skip_fields=posted_fields)
+        for payload_key, stored_names in promoted.items():
+            payload[payload_key] = stored_names
+
+    update_payload(intake_id, payload)
+
+    if draft is not None:
+        delete_draft(draft["token"])
+
+    # Everything else (triage, notifications, ...) happens in worker.py
+    enqueue_job("triage_intake", {"intake_id": intake_id})
+
+    return redirect(url_for("thankyou", intake_id=intake_id))
+
+
+@app.route("/drafts", methods=["POST"])
+def draft_create():
+    row = create_draft()
+    return jsonify({"token": row["token"], "expires_at_utc": row["expires_at_utc"]}), 201
+
+
+@app.route("/drafts/<token>", methods=["GET"])
+def draft_get(token: str):
+    draft = fetch_draft(token)
+    if draft is None:
+        return jsonify({"error": "Draft not found or expired"}), 404
+
+    uploads = [
+        {
+            "id": u["id"],
+            "field": u["field"],
+            "filename": u["filename"],
+            "size": u["size"],
+            "received": u["received"],
+        }
+        for u in fetch_draft_uploads(token)
+    ]
+
+    return jsonify(
+        {
+            "token": draft["token"],
+            "expires_at_utc": draft["expires_at_utc"],
+            "answers": json.loads(draft["data_json"]),
+            "uploads": uploads,
+        }
+    )
+
+
+@app.route("/drafts/<token>", methods=["PATCH"])
+def draft_patch(token: str):
+    if (request.content_length or 0) > DRAFT_MAX_PATCH_BYTES:
+        return jsonify({"error": "Patch too large"}), 413
+
+    patch = request.get_json(silent=True)
+    if not isinstance(patch, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+
+    draft = patch_draft(token, patch)
+    if draft is None:
+        if fetch_draft(token) is None:
+            return jsonify({"error": "Draft not found or expired"}), 404
+        return jsonify({"error": "Draft too large"}), 413
+
+    return jsonify({"token": draft["token"], "expires_at_utc": draft["expires_at_utc"]})
+
+
+@app.route("/drafts/<token>/uploads", methods=["POST"])
+def draft_upload_create(token: str):
+    if fetch_draft(token) is None:
+        return jsonify({"error": "Draft not found or expired"}), 404
+
+    body = request.get_json(silent=True) or {}
+    field = body.get("field")
+    filename = str(body.get("filename") or "")
+    size = body.get("size")
+
+    if field not in UPLOAD_FIELDS:
+        return jsonify({"error": "Unknown upload field"}), 400
+    if not allowed_file(filename) or not secure_filename(filename):
+        return jsonify({"error": "File type not allowed"}), 400
+    if not isinstance(size, int) or size <= 0 or size > MAX_FILE_SIZE_MB * 1024 * 1024:
+        return jsonify({"error": f"File must be under {MAX_FILE_SIZE_MB}MB"}), 400
+
+    upload = create_draft_upload(token, field, filename, size)
+    if upload is None:
+        return jsonify({"error": f"At most {DRAFT_MAX_UPLOADS_PER_FIELD} files per field"}), 409
+
+    return jsonify({"id": upload["id"], "size": upload["size"], "received": upload["received"]}), 201
+
+
+@app.route("/drafts/<token>/uploads", methods=["DELETE"])
+def draft_upload_clear(token: str):
+    if fetch_draft(token) is None:
+        return jsonify({"error": "Draft not found or expired"}), 404
+
+    field = request.args.get("field")
+    if field not in UPLOAD_FIELDS:
+        return jsonify({"error": "Unknown upload field"}), 400
+
+    deleted = delete_draft_uploads(token, field)
+    return jsonify({"field": field, "deleted": deleted})
+
+
+@app.route("/drafts/<token>/uploads/<upload_id>", methods=["GET"])
+def draft_upload_status(token: str, upload_id: str):
+    upload = fetch_draft_upload(token, upload_id)
+    if upload is None:
+        return jsonify({"error": "Upload not found"}), 404
+    return jsonify({"id": upload["id"], "size": upload["size"], "received": upload["received"]})
+
+
+@app.route("/drafts/<token>/uploads/<upload_id>", methods=["PUT"])
+def draft_upload_chunk(token: str, upload_id: str):
+    upload = fetch_draft_upload(token, upload_id)
+    if upload is None or fetch_draft(token) is None:
+        return jsonify({"error": "Upload not found"}), 404
+
+    try:
+        offset = int(request.headers.get("Upload-Offset", ""))
+    except ValueError:
+        return jsonify({"error": "Upload-Offset header required"}), 400
+
+    # Client must resume from what we have (gaps would corrupt the file)
+    if offset < 0 or offset > upload["received"]:
+        return jsonify({"error": "Offset mismatch", "received": upload["received"]}), 409
+
+    if (request.content_length or 0) > DRAFT_MAX_CHUNK_BYTES:
+        return jsonify({"error": "Chunk too large"}), 413
+
+    chunk = request.get_data(cache=False)
+    if offset + len(chunk) > upload["size"]:
+        return jsonify({"error": "Chunk exceeds declared size"}), 400
+
+    received = write_draft_chunk(upload, offset, chunk)
+    return jsonify({"id": upload["id"], "size": upload["size"], "received": received})
+
+
+@app.route("/thankyou/<int:intake_id>", methods=["GET"])
+def thankyou(intake_id: int):
+    row = fetch_intake(intake_id)
+    if row is None:
+        return "Not found", 404
+    return render_template("thankyou.html", intake_id=intake_id)
+
+
+@app.route("/summary/<int:intake_id>", methods=["GET"])
+@require_basic_auth
+def summary(intake_id: int):
+    row = fetch_intake(intake_id)
+    if row is None:
+        return "Not found", 404
+
+    summary_data = build_summary_data(row)
+
     return render_template("summary.html", intake_id=intake_id, s=summary_data)
 
 @app.route("/coach", methods=["GET"])
@@ -386,6 +1313,57 @@ def export_csv():
     )
 
 
+@app.route("/export/intake/<int:intake_id>.zip", methods=["GET"])
+@require_basic_auth
+def export_intake_zip(intake_id: int):
+    row = fetch_intake(intake_id)
+    if row is None:
+        return "Not found", 404
+
+    return zip_response(intake_bundle_entries(row), f"intake_{intake_id}.zip")
+
+
+@app.route("/export/intakes.zip", methods=["GET"])
+@require_basic_auth
+def export_intakes_zip():
+    # dict.fromkeys: drop repeated ids (duplicate archive entries) but keep order
+    intake_ids = list(dict.fromkeys(request.args.getlist("ids", type=int)))
+    if not intake_ids:
+        return "No intakes selected", 400
+
+    def entries():
+        for intake_id in intake_ids:
+            row = fetch_intake(intake_id)
+            if row is None:
+                continue
+            yield from intake_bundle_entries(row, prefix=f"intake_{intake_id}/")
+
+    return zip_response(entries(), "intakes.zip")
+
+
+# ------------------------------------------------------------
+# CLI (coach accounts)
+# ------------------------------------------------------------
+
+@app.cli.command("add-coach")
+@click.argument("username")
+@click.password_option()
+def add_coach_command(username: str, password: str) -> None:
+    """Create a coach account, or reset the password of an existing one."""
+    upsert_coach(username, password)
+    click.echo(f"Coach {username!r} saved.")
+
+
+@app.cli.command("remove-coach")
+@click.argument("username")
+def remove_coach_command(username: str) -> None:
+    """Delete a coach account."""
+    if delete_coach(username):
+        click.echo(f"Coach {username!r} removed.")
+    else:
+        click.echo(f"No coach named {username!r}.")
+
+
 # ------------------------------------------------------------
 # Main
 # ------------------------------------------------------------
@@ -359,3 +359,16 @@ def flatten_questions(sections: list[dict]) -> list[dict]:
             flat.append(q)
     return flat
 
+
+def build_dependency_map(sections: list[dict]) -> dict[str, list[dict]]:
+    # field -> questions whose show_if reads it, so the form only re-checks those on change
+    dependents: dict[str, list[dict]] = {}
+    for section in sections:
+        for q in section.get("questions", []):
+            condition = q.get("show_if")
+            if not condition:
+                continue
+            dependents.setdefault(condition["field"], []).append(
+                {"name": q["name"], "show_if": condition}
+            )
+    return dependents
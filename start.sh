@@ -0,0 +1,18 @@
+#!/usr/bin/env sh
+# start.sh - web + background worker in one service (e.g. Render start command: ./start.sh)
+
+# Worker drains the jobs table; on SIGTERM it finishes its current job, then exits
+python worker.py &
+WORKER_PID=$!
+
+gunicorn app:app --bind "0.0.0.0:${PORT:-5000}" &
+WEB_PID=$!
+
+trap 'kill -TERM "$WEB_PID" "$WORKER_PID" 2>/dev/null' INT TERM
+
+# Return when gunicorn exits (deploy/crash) and take the worker down with it
+wait "$WEB_PID"
+STATUS=$?
+kill -TERM "$WORKER_PID" 2>/dev/null
+wait "$WORKER_PID"
+exit "$STATUS"
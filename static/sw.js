@@ -0,0 +1,156 @@
+// sw.js
+// Service worker for the intake form:
+// - serves the cached form shell instantly, refreshing it in the background
+// - queues /submit POSTs in IndexedDB when offline and replays them later
+
+const CACHE_NAME = "intake-shell-v1";
+const SHELL_URL = "/";
+
+const DB_NAME = "intake-outbox";
+const STORE = "submissions";
+const SYNC_TAG = "intake-outbox";
+
+self.addEventListener("install", (event) => {
+  event.waitUntil(
+    caches.open(CACHE_NAME).then(cache => cache.add(SHELL_URL)).then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil(
+    caches.keys()
+      .then(keys => Promise.all(keys.filter(k => k !== CACHE_NAME).map(k => caches.delete(k))))
+      .then(() => self.clients.claim())
+  );
+});
+
+// ------------------------------------------------------------
+// IndexedDB outbox
+// ------------------------------------------------------------
+function openDb() {
+  return new Promise((resolve, reject) => {
+    const req = indexedDB.open(DB_NAME, 1);
+    req.onupgradeneeded = () => req.result.createObjectStore(STORE, { keyPath: "id", autoIncrement: true });
+    req.onsuccess = () => resolve(req.result);
+    req.onerror = () => reject(req.error);
+  });
+}
+
+function withStore(mode, fn) {
+  return openDb().then(db => new Promise((resolve, reject) => {
+    const tx = db.transaction(STORE, mode);
+    const result = fn(tx.objectStore(STORE));
+    tx.oncomplete = () => resolve(result.result !== undefined ? result.result : result);
+    tx.onerror = () => reject(tx.error);
+  }));
+}
+
+async function queueSubmission(request) {
+  const formData = await request.formData();
+  // Files are kept as Blobs; IndexedDB stores them natively
+  const entries = [];
+  for (const [name, value] of formData.entries()) {
+    entries.push(value instanceof File ? [name, value, value.name] : [name, value]);
+  }
+  await withStore("readwrite", store => store.add({ entries, queuedAt: Date.now() }));
+
+  if (self.registration.sync) {
+    try { await self.registration.sync.register(SYNC_TAG); } catch (_) {}
+  }
+}
+
+async function sendOutbox() {
+  const items = await withStore("readonly", store => store.getAll());
+
+  for (const item of items) {
+    const body = new FormData();
+    item.entries.forEach(([name, value, filename]) => {
+      if (filename !== undefined) body.append(name, value, filename);
+      else body.append(name, value);
+    });
+
+    let res;
+    try {
+      res = await fetch("/submit", { method: "POST", body });
+    } catch (_) {
+      return;  // still offline; try again on the next sync/online event
+    }
+
+    // 2xx: stored (or already stored - the server dedupes on submission_id).
+    // 4xx: will never succeed; drop it so it can't block later submissions.
+    // 5xx: keep it for the next flush, but carry on with the rest.
+    if (res.ok || (res.status >= 400 && res.status < 500)) {
+      await withStore("readwrite", store => store.delete(item.id));
+    }
+  }
+}
+
+// Page load, "online", Background Sync and postMessage can all fire together:
+// only one flush runs at a time, later triggers share it
+let flushing = null;
+
+function flushOutbox() {
+  if (!flushing) {
+    flushing = sendOutbox().finally(() => { flushing = null; });
+  }
+  return flushing;
+}
+
+self.addEventListener("sync", (event) => {
+  if (event.tag === SYNC_TAG) event.waitUntil(flushOutbox());
+});
+
+self.addEventListener("message", (event) => {
+  if (event.data && event.data.type === "flush-outbox") event.waitUntil(flushOutbox());
+});
+
+// ------------------------------------------------------------
+// Fetch handling
+// ------------------------------------------------------------
+const QUEUED_PAGE = `<!doctype html>
+<html><head><meta charset="utf-8" /><meta name="viewport" content="width=device-width, initial-scale=1" />
+<title>Saved offline</title>
+<style>body{font-family:system-ui,-apple-system,Segoe UI,Roboto,Arial;margin:0}.wrap{max-width:780px;margin:0 auto;padding:18px}.card{border:1px solid #e6e6e6;border-radius:10px;padding:14px}</style>
+</head><body><div class="wrap"><div class="card">
+<h2>Saved — you're offline.</h2>
+<p>Your intake is stored on this device and will be sent automatically as soon as you have signal again.
+Keep this browser open or reopen the form once you're back online.</p>
+</div></div></body></html>`;
+
+async function handleSubmit(request) {
+  // A rejection may also mean the response was lost after the server committed;
+  // replaying is still safe because the form carries a submission_id
+  const copy = request.clone();
+  try {
+    return await fetch(request);
+  } catch (_) {
+    await queueSubmission(copy);
+    return new Response(QUEUED_PAGE, { status: 202, headers: { "Content-Type": "text/html; charset=utf-8" } });
+  }
+}
+
+async function handleShell(request) {
+  const cache = await caches.open(CACHE_NAME);
+  const cached = await cache.match(SHELL_URL);
+
+  const refresh = fetch(request)
+    .then(res => {
+      if (res.ok) cache.put(SHELL_URL, res.clone());
+      return res;
+    })
+    .catch(() => undefined);
+
+  // Stale-while-revalidate: the cached form renders immediately, even with no signal
+  return cached || (await refresh) || Response.error();
+}
+
+self.addEventListener("fetch", (event) => {
+  const url = new URL(event.request.url);
+  if (url.origin !== self.location.origin) return;
+
+  if (event.request.method === "POST" && url.pathname === "/submit") {
+    event.respondWith(handleSubmit(event.request));
+  } else if (event.request.method === "GET" && url.pathname === SHELL_URL) {
+    event.respondWith(handleShell(event.request));
+  }
+});
@@ -0,0 +1,62 @@
+# tests/test_submit.py
+# Submit idempotency as seen from one browser (run: python -m unittest)
+
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import app
+
+
+class SubmitReplayTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        tmp = Path(self._tmp.name)
+
+        self._saved = (app.DB_PATH, app.app.config["UPLOAD_FOLDER"])
+        app.DB_PATH = tmp / "intakes.sqlite3"
+        app.app.config["UPLOAD_FOLDER"] = str(tmp)
+        app.init_db()
+
+        self.client = app.app.test_client()
+
+    def tearDown(self) -> None:
+        app.DB_PATH, app.app.config["UPLOAD_FOLDER"] = self._saved
+        self._tmp.cleanup()
+
+    def intake_names(self) -> list[str | None]:
+        return [row["athlete_name"] for row in reversed(app.fetch_all_intakes())]
+
+    def test_queued_replay_between_two_submissions_keeps_both(self) -> None:
+        # Athlete 1 submits offline: the service worker queues this exact body
+        queued = {"submission_id": "browser-id-1", "athlete_name": "First", "age": "19"}
+
+        # form.html switches to a fresh id on submit, so athlete 2 on the
+        # same phone posts under a new one while the first is still queued
+        second = self.client.post(
+            "/submit",
+            data={"submission_id": "browser-id-2", "athlete_name": "Second", "age": "22"},
+        )
+        self.assertEqual(second.status_code, 302)
+
+        # Back online: the outbox replays the first submission
+        replayed = self.client.post("/submit", data=queued)
+        self.assertEqual(replayed.status_code, 302)
+        self.assertNotEqual(replayed.location, second.location)
+
+        self.assertEqual(self.intake_names(), ["Second", "First"])
+
+    def test_replaying_the_same_submission_does_not_duplicate(self) -> None:
+        body = {"submission_id": "browser-id-1", "athlete_name": "Only", "age": "19"}
+
+        first = self.client.post("/submit", data=body)
+        again = self.client.post("/submit", data=body)
+
+        self.assertEqual(first.location, again.location)
+        self.assertEqual(self.intake_names(), ["Only"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+# worker.py
+# Background job worker - drains the SQLite `jobs` table filled by app.py
+#
+# Run alongside the web process; start.sh launches both (use it as the start command).
+
+from __future__ import annotations
+
+import os
+import signal
+import socket
+import time
+import traceback
+
+from app import claim_next_job, prune_finished_jobs, purge_expired_drafts, run_job
+
+POLL_INTERVAL_SECONDS = float(os.environ.get("WORKER_POLL_SECONDS", "1.0"))
+HOUSEKEEPING_INTERVAL_SECONDS = 15 * 60
+MAX_ERROR_BACKOFF_SECONDS = 60.0
+
+_stopping = False
+
+
+def _request_stop(signum, frame) -> None:
+    # Finish the current job, then exit (Render/gunicorn send SIGTERM on deploy)
+    global _stopping
+    _stopping = True
+
+
+def main() -> None:
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+
+    print("Worker started:", worker_id)
+
+    next_purge = 0.0
+    failures = 0
+
+    while not _stopping:
+        # Housekeeping: expired autosave drafts (+ partial uploads) and old finished jobs
+        if time.monotonic() >= next_purge:
+            next_purge = time.monotonic() + HOUSEKEEPING_INTERVAL_SECONDS
+            try:
+                purged = purge_expired_drafts()
+                if purged:
+                    print("Purged expired drafts:", purged)
+                pruned = prune_finished_jobs()
+                if pruned:
+                    print("Pruned finished jobs:", pruned)
+            except Exception:
+                # Retried next interval; never worth stopping the job loop for
+                print("Housekeeping failed:")
+                traceback.print_exc()
+
+        # DB errors (e.g. "database is locked" past the timeout) must not kill the
+        # worker: log, back off, try again. A claimed job's lease simply expires.
+        try:
+            job = claim_next_job(worker_id)
+            if job is not None:
+                run_job(job)
+        except Exception:
+            failures += 1
+            delay = min(MAX_ERROR_BACKOFF_SECONDS, POLL_INTERVAL_SECONDS * 2**failures)
+            print(f"Worker loop error (retrying in {delay:.0f}s):")
+            traceback.print_exc()
+            time.sleep(delay)
+            continue
+
+        failures = 0
+        if job is None:
+            time.sleep(POLL_INTERVAL_SECONDS)
+
+    print("Worker stopped:", worker_id)
+
+
+if __name__ == "__main__":
+    main()